@@ -2,13 +2,16 @@
 Agent 모듈: Tavily 검색과 LLM을 결합한 리포트 생성 에이전트
 """
 import os
-from typing import Dict, List, Any
+import time
+from typing import Dict, List, Any, Union
 from dotenv import load_dotenv
 from langchain_tavily import TavilySearch
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 from llm import get_llm
+from cassette import get_cassette, flush_cassette, CassetteSearchTool, CassetteMissError
+from router import get_model_ladder, select_model, check_draft, record_routing
 from utils import format_search_results, extract_urls
 from logging_utils import section, step, info, success, search as log_search, llm as log_llm
 
@@ -16,13 +19,20 @@ from logging_utils import section, step, info, success, search as log_search, ll
 load_dotenv()
 
 
-def get_search_tool() -> TavilySearch:
+def get_search_tool() -> Union[TavilySearch, CassetteSearchTool]:
     """
     Tavily 검색 도구를 초기화하여 반환합니다.
     
+    CASSETTE_MODE가 설정되어 있으면 녹화/재생 래퍼를 반환합니다.
+    
     Returns:
-        TavilySearch: 초기화된 Tavily 검색 도구
+        TavilySearch | CassetteSearchTool: 초기화된 검색 도구
     """
+    # 재생 모드에서는 API Key 없이 카세트에서 응답
+    cassette = get_cassette()
+    if cassette is not None and cassette.replaying:
+        return CassetteSearchTool(cassette)
+    
     # API Key 확인
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key or api_key == "your_tavily_api_key_here":
@@ -31,12 +41,15 @@ def get_search_tool() -> TavilySearch:
             ".env 파일에 TAVILY_API_KEY를 설정하거나 UI에서 입력하세요."
         )
     
-    return TavilySearch(
+    tool = TavilySearch(
         max_results=3,
         search_depth="advanced",
         include_answer=True,
         include_raw_content=True
     )
+    if cassette is not None:
+        return CassetteSearchTool(cassette, tool)
+    return tool
 
 
 def create_report_prompt() -> ChatPromptTemplate:
@@ -74,17 +87,19 @@ def create_report_prompt() -> ChatPromptTemplate:
     ])
 
 
-def generate_report(topic: str) -> Dict[str, Any]:
+def generate_report(topic: str, latency_tier: str = "balanced") -> Dict[str, Any]:
     """
     주제에 대한 리서치를 수행하고 리포트를 생성합니다.
     
     Args:
         topic: 리서치 주제
+        latency_tier: 모델 라우팅 티어 ("fast" / "balanced" / "quality")
         
     Returns:
         dict: {
             "report": 생성된 리포트 본문,
             "sources": 참고한 URL 리스트,
+            "model": 최종 리포트를 생성한 모델 이름,
             "raw_results": 원본 검색 결과 (선택사항)
         }
         
@@ -109,6 +124,9 @@ def generate_report(topic: str) -> Dict[str, Any]:
         try:
             log_search("검색 수행", kv={"query_len": str(len(topic))})
             search_response = search_tool.invoke(topic)
+        except CassetteMissError:
+            # 재생 모드의 카세트 누락은 그대로 전달
+            raise
         except Exception as e:
             raise Exception(
                 f"[Tavily 검색 실패] 주제: '{topic}'\n"
@@ -189,26 +207,6 @@ def generate_report(topic: str) -> Dict[str, Any]:
                 f"첫 번째 결과 내용: {str(search_results[0])[:200] if search_results else 'N/A'}"
             )
         
-        # LLM 및 프롬프트 초기화
-        try:
-            log_llm("LLM 준비 중")
-            llm = get_llm()
-        except ConnectionError as e:
-            raise ConnectionError(
-                f"[LLM 연결 실패] Ollama 서버에 연결할 수 없습니다.\n"
-                f"오류 내용: {str(e)}\n"
-                f"해결 방법:\n"
-                f"1. Ollama가 실행 중인지 확인 (ollama serve)\n"
-                f"2. 포트가 올바른지 확인 (기본: 11434)\n"
-                f"3. 방화벽 설정 확인"
-            )
-        except Exception as e:
-            raise Exception(
-                f"[LLM 초기화 실패] LLM을 초기화하는 중 오류 발생\n"
-                f"오류 타입: {type(e).__name__}\n"
-                f"오류 내용: {str(e)}"
-            )
-        
         try:
             prompt = create_report_prompt()
         except Exception as e:
@@ -218,31 +216,89 @@ def generate_report(topic: str) -> Dict[str, Any]:
                 f"오류 내용: {str(e)}"
             )
         
-        # 체인 구성 및 실행
-        try:
-            chain = prompt | llm | StrOutputParser()
-            step("LLM 체인 실행")
-            report = chain.invoke({
-                "topic": topic,
-                "search_results": formatted_results
-            })
-        except Exception as e:
-            raise Exception(
-                f"[리포트 생성 실패] LLM 체인 실행 중 오류 발생\n"
-                f"주제: '{topic}'\n"
-                f"오류 타입: {type(e).__name__}\n"
-                f"오류 내용: {str(e)}\n"
-                f"검색 결과 길이: {len(formatted_results)} 문자\n"
-                f"참고: LLM 모델이 설치되어 있는지 확인하세요 (ollama list)"
-            )
+        # 모델 라우팅: 작은 모델부터 시도하고 실행 오류나 품질 검사 실패 시 상위 모델로 승격
+        ladder = get_model_ladder()
+        prompt_chars = len(topic) + len(formatted_results)
+        start = select_model(prompt_chars, latency_tier)
+        info("모델 라우팅", kv={"tier": latency_tier, "chars": str(prompt_chars), "start": ladder[start]})
+        
+        report = ""
+        model_name = ladder[start]
+        for idx in range(start, len(ladder)):
+            model_name = ladder[idx]
+            is_last = idx == len(ladder) - 1
+            
+            # LLM 초기화
+            started = time.perf_counter()
+            try:
+                log_llm("LLM 준비 중", kv={"model": model_name})
+                llm = get_llm(model_name)
+            except Exception as e:
+                if not is_last:
+                    # 모델 미설치 등으로 실패하면 다음 모델로 승격
+                    record_routing(model_name, latency_tier, prompt_chars, time.perf_counter() - started,
+                                   False, [], True, error=type(e).__name__)
+                    continue
+                if isinstance(e, ConnectionError):
+                    raise ConnectionError(
+                        f"[LLM 연결 실패] Ollama 서버에 연결할 수 없습니다.\n"
+                        f"오류 내용: {str(e)}\n"
+                        f"해결 방법:\n"
+                        f"1. Ollama가 실행 중인지 확인 (ollama serve)\n"
+                        f"2. 포트가 올바른지 확인 (기본: 11434)\n"
+                        f"3. 방화벽 설정 확인"
+                    )
+                raise Exception(
+                    f"[LLM 초기화 실패] LLM을 초기화하는 중 오류 발생\n"
+                    f"모델: {model_name}\n"
+                    f"오류 타입: {type(e).__name__}\n"
+                    f"오류 내용: {str(e)}"
+                )
+            
+            # 체인 구성 및 실행
+            try:
+                chain = prompt | llm | StrOutputParser()
+                step("LLM 체인 실행", kv={"model": model_name})
+                started = time.perf_counter()
+                report = chain.invoke({
+                    "topic": topic,
+                    "search_results": formatted_results
+                })
+                elapsed = time.perf_counter() - started
+            except CassetteMissError:
+                # 재생 중 누락은 승격하지 않음 (녹화와 다른 경로로 재생되는 것을 방지)
+                raise
+            except Exception as e:
+                if not is_last:
+                    # 모델 미설치("model not found") 등 실행 오류도 다음 모델로 승격
+                    record_routing(model_name, latency_tier, prompt_chars, time.perf_counter() - started,
+                                   False, [], True, error=type(e).__name__)
+                    continue
+                raise Exception(
+                    f"[리포트 생성 실패] LLM 체인 실행 중 오류 발생\n"
+                    f"주제: '{topic}'\n"
+                    f"모델: {model_name}\n"
+                    f"오류 타입: {type(e).__name__}\n"
+                    f"오류 내용: {str(e)}\n"
+                    f"검색 결과 길이: {len(formatted_results)} 문자\n"
+                    f"참고: LLM 모델이 설치되어 있는지 확인하세요 (ollama list)"
+                )
+            
+            # 초안 품질 검사 (마지막 모델의 결과는 그대로 사용)
+            passed, problems = check_draft(report)
+            escalate = not passed and not is_last
+            record_routing(model_name, latency_tier, prompt_chars, elapsed, passed, problems, escalate)
+            if not escalate:
+                break
         
         success("리포트 생성 완료")
         return {
             "report": report,
-            "sources": sources
+            "sources": sources,
+            "model": model_name
         }
         
-    except (ValueError, ConnectionError) as e:
+    except (ValueError, ConnectionError, CassetteMissError) as e:
         # 이미 상세한 메시지가 포함된 예외는 그대로 전달
         raise
     except Exception as e:
@@ -254,3 +310,6 @@ def generate_report(topic: str) -> Dict[str, Any]:
             f"주제: '{topic}'\n"
             f"디버깅을 위해 전체 스택 트레이스를 확인하세요."
         )
+    finally:
+        # 녹화 모드라면 이번 실행에서 기록된 내용을 카세트 파일에 저장
+        flush_cassette()
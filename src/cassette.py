@@ -0,0 +1,359 @@
+"""
+Cassette 모듈: Tavily 검색 / Ollama LLM 상호작용 녹화(record) 및 재생(replay)
+
+녹화 모드에서는 모든 검색 응답과 LLM 스트리밍 청크(토큰 간 시간 포함)를
+gzip으로 압축된 JSONL 카세트 파일에 기록하고, 재생 모드에서는 같은
+get_search_tool / get_llm 인터페이스로 기록된 응답을 돌려줍니다.
+
+녹화 세션은 항상 빈 카세트에서 시작하여 기존 파일을 덮어쓰며, 같은 세션에서
+같은 요청을 다시 녹화하면 새 기록이 이전 기록을 대체합니다 (요청당 기록 1개).
+기록은 메모리에 모아 두었다가 리포트 생성이 끝날 때마다 파일 전체를 하나의
+gzip 스트림으로 다시 씁니다.
+
+카세트 항목 종류
+- search: 검색어, 응답, 지연 시간
+- prompt: LLM에 전달된 프롬프트 메시지 (같은 프롬프트는 모델이 달라도 한 번만 저장)
+- llm: 모델, 프롬프트 해시, 직전 검색 항목 키, 스트리밍 청크와 청크 간 시간
+  (호출이 실패했다면 오류 내용도 함께 저장하여 재생 시 같은 실패와 모델 승격을 재현)
+
+환경 변수
+- CASSETTE_MODE: off(기본) / record / replay
+- CASSETTE_PATH: 카세트 파일 경로 (기본 "cassettes/session.jsonl.gz")
+- CASSETTE_SPEED: original(기본, 기록된 시간대로 재생) / fast (대기 없이 재생)
+- CASSETTE_MATCH: strict(기본, 모델 + 프롬프트가 정확히 같아야 재생) /
+  topic (정확히 일치하는 기록이 없으면 같은 모델 + 같은 검색어의 기록으로 대체, 경고 출력)
+"""
+import os
+import gzip
+import json
+import time
+import atexit
+import hashlib
+import threading
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from logging_utils import info, success, warn
+
+
+CASSETTE_MODES = ("off", "record", "replay")
+CASSETTE_SPEEDS = ("original", "fast")
+CASSETTE_MATCHES = ("strict", "topic")
+DEFAULT_CASSETTE_PATH = os.path.join("cassettes", "session.jsonl.gz")
+
+
+class CassetteMissError(LookupError):
+    """재생 모드에서 요청에 해당하는 기록이 카세트에 없을 때 발생합니다."""
+
+
+class CassetteRecordedError(RuntimeError):
+    """녹화 당시 LLM 호출이 실패한 기록을 재생할 때 같은 실패를 재현하기 위해 발생합니다."""
+
+
+def _hash_key(*parts: str) -> str:
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def _to_messages(value: Any) -> List[BaseMessage]:
+    if hasattr(value, "to_messages"):
+        return value.to_messages()
+    if isinstance(value, str):
+        return [HumanMessage(content=value)]
+    return list(value)
+
+
+def _serialize_messages(messages: List[BaseMessage]) -> List[List[Any]]:
+    return [[m.type, m.content] for m in messages]
+
+
+def _prompt_key(messages: List[List[Any]]) -> str:
+    return _hash_key("prompt", json.dumps(messages, ensure_ascii=False))
+
+
+def _llm_key(model_name: str, prompt_key: str) -> str:
+    return _hash_key("llm", model_name, prompt_key)
+
+
+class Cassette:
+    """
+    녹화/재생 대상 카세트 파일.
+
+    요청(kind, key)마다 기록 하나를 보관합니다. 여러 Streamlit 세션이 같은
+    카세트를 공유하므로 기록 변경과 파일 쓰기는 잠금으로 보호하고, LLM 기록을
+    검색과 연결하기 위한 직전 검색 키는 스레드(세션)별로 따로 둡니다.
+    """
+
+    def __init__(self, path: str, mode: str, speed: str = "original", match: str = "strict"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"알 수 없는 카세트 모드입니다: '{mode}' (사용 가능: record, replay)")
+        if speed not in CASSETTE_SPEEDS:
+            raise ValueError(
+                f"알 수 없는 재생 속도입니다: '{speed}' (사용 가능: {', '.join(CASSETTE_SPEEDS)})"
+            )
+        if match not in CASSETTE_MATCHES:
+            raise ValueError(
+                f"알 수 없는 매칭 방식입니다: '{match}' (사용 가능: {', '.join(CASSETTE_MATCHES)})"
+            )
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.match = match
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._by_topic: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def current_search(self) -> Optional[str]:
+        """현재 스레드에서 마지막으로 처리한 검색 항목 키."""
+        return getattr(self._local, "search", None)
+
+    @current_search.setter
+    def current_search(self, key: Optional[str]) -> None:
+        self._local.search = key
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        self._entries.pop((entry["kind"], entry["key"]), None)
+        self._entries[(entry["kind"], entry["key"])] = entry
+        if entry["kind"] == "llm" and entry.get("search"):
+            self._by_topic[(entry["model"], entry["search"])] = entry
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            raise ValueError(
+                f"카세트 파일을 찾을 수 없습니다: {self.path}\n"
+                f"CASSETTE_MODE=record 로 먼저 녹화하세요."
+            )
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                self._index(json.loads(line))
+        success(
+            "카세트 로드 완료",
+            kv={"path": self.path, "entries": str(len(self._entries)), "speed": self.speed, "match": self.match},
+        )
+
+    def lookup(self, kind: str, key: str) -> Dict[str, Any]:
+        """요청에 해당하는 기록을 꺼냅니다."""
+        entry = self._entries.get((kind, key))
+        if entry is None:
+            raise CassetteMissError(
+                f"[카세트 기록 없음] {kind} 요청(key={key})이 카세트에 없습니다: {self.path}\n"
+                f"프롬프트나 검색어가 녹화 시점과 달라졌다면 다시 녹화하세요."
+            )
+        return entry
+
+    def lookup_llm(self, model_name: str, prompt_key: str) -> Dict[str, Any]:
+        """
+        LLM 기록을 꺼냅니다. topic 매칭에서는 프롬프트가 달라져도
+        같은 모델 + 같은 검색어로 녹화된 기록을 경고와 함께 돌려줍니다.
+        """
+        entry = self._entries.get(("llm", _llm_key(model_name, prompt_key)))
+        if entry is not None:
+            return entry
+        search_key = self.current_search
+        if self.match == "topic" and search_key:
+            entry = self._by_topic.get((model_name, search_key))
+            if entry is not None:
+                warn(
+                    "카세트 근사 매칭 (프롬프트 불일치)",
+                    kv={"model": model_name, "prompt": prompt_key, "recorded": entry.get("prompt", "N/A")},
+                )
+                return entry
+        raise CassetteMissError(
+            f"[카세트 기록 없음] 모델 '{model_name}'의 LLM 요청(prompt={prompt_key})이 카세트에 없습니다: {self.path}\n"
+            f"프롬프트 형식을 바꾼 실험이라면 CASSETTE_MATCH=topic 으로 재생하고, "
+            f"모델 래더나 검색어가 달라졌다면 다시 녹화하세요."
+        )
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """항목 하나를 기록합니다. 같은 요청의 이전 기록은 대체됩니다."""
+        with self._lock:
+            self._index(entry)
+            self._dirty = True
+        info("카세트 기록", kv={"kind": entry["kind"], "key": entry["key"]})
+
+    def flush(self) -> None:
+        """녹화된 기록 전체를 하나의 gzip 스트림으로 파일에 씁니다."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                for entry in self._entries.values():
+                    # Tavily 오류 응답 속 예외 객체 등 JSON으로 표현할 수 없는 값은 문자열로 저장
+                    f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n")
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            count = len(self._entries)
+        success("카세트 저장 완료", kv={"path": self.path, "entries": str(count)})
+
+    def pause(self, seconds: float) -> None:
+        """original 속도일 때 기록된 시간만큼 대기합니다."""
+        if self.speed == "original" and seconds > 0:
+            time.sleep(seconds)
+
+
+class CassetteSearchTool:
+    """
+    TavilySearch와 같은 invoke 인터페이스를 제공하는 녹화/재생 래퍼.
+    """
+
+    def __init__(self, cassette: Cassette, tool: Optional[Any] = None):
+        if tool is None and not cassette.replaying:
+            raise ValueError("녹화 모드에서는 실제 검색 도구가 필요합니다.")
+        self.cassette = cassette
+        self.tool = tool
+
+    def invoke(self, query: str, **kwargs: Any) -> Any:
+        key = _hash_key("search", str(query))
+        # 뒤따르는 LLM 기록을 이 검색과 연결
+        self.cassette.current_search = key
+        if self.cassette.replaying:
+            entry = self.cassette.lookup("search", key)
+            self.cassette.pause(entry["latency"])
+            return entry["response"]
+
+        started = time.perf_counter()
+        response = self.tool.invoke(query, **kwargs)
+        self.cassette.record({
+            "kind": "search",
+            "key": key,
+            "query": str(query),
+            "latency": round(time.perf_counter() - started, 4),
+            "response": response,
+        })
+        return response
+
+
+class CassetteChatModel(Runnable):
+    """
+    ChatOllama 대신 체인에 연결되는 녹화/재생 래퍼.
+
+    녹화 시에는 실제 모델을 스트리밍으로 호출하여 청크와 청크 간 시간을 기록하고
+    (프롬프트 메시지는 별도 prompt 항목으로 한 번만 저장), 재생 시에는 기록된 청크를
+    같은 간격(또는 대기 없이)으로 돌려줍니다.
+    """
+
+    def __init__(self, cassette: Cassette, model_name: str, llm: Optional[Runnable] = None):
+        if llm is None and not cassette.replaying:
+            raise ValueError("녹화 모드에서는 실제 LLM이 필요합니다.")
+        self.cassette = cassette
+        self.model_name = model_name
+        self.llm = llm
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        content = "".join(chunk.content for chunk in self.stream(input, config, **kwargs))
+        return AIMessage(content=content)
+
+    def stream(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Iterator[AIMessageChunk]:
+        messages = _serialize_messages(_to_messages(input))
+        prompt_key = _prompt_key(messages)
+        if self.cassette.replaying:
+            entry = self.cassette.lookup_llm(self.model_name, prompt_key)
+            for delay, text in entry["chunks"]:
+                self.cassette.pause(delay)
+                yield AIMessageChunk(content=text)
+            if entry.get("error"):
+                raise CassetteRecordedError(entry["error"])
+            return
+
+        chunks: List[List[Any]] = []
+        error: Optional[str] = None
+        last = time.perf_counter()
+        try:
+            for chunk in self.llm.stream(input, config, **kwargs):
+                now = time.perf_counter()
+                chunks.append([round(now - last, 4), chunk.content])
+                last = now
+                yield chunk
+        except Exception as e:
+            # 모델 미설치 등 실패도 기록하여 재생 시 같은 경로(승격)를 따르게 함
+            chunks.append([round(time.perf_counter() - last, 4), ""])
+            error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            self._record_take(messages, prompt_key, chunks, error)
+
+    def _record_take(
+        self, messages: List[List[Any]], prompt_key: str, chunks: List[List[Any]], error: Optional[str]
+    ) -> None:
+        self.cassette.record({
+            "kind": "prompt",
+            "key": prompt_key,
+            "messages": messages,
+        })
+        self.cassette.record({
+            "kind": "llm",
+            "key": _llm_key(self.model_name, prompt_key),
+            "model": self.model_name,
+            "prompt": prompt_key,
+            "search": self.cassette.current_search,
+            "chunks": chunks,
+            "error": error,
+        })
+
+
+_CASSETTE: Optional[Cassette] = None
+_CASSETTE_LOCK = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    환경 변수 설정에 맞는 카세트를 반환합니다.
+
+    Returns:
+        Optional[Cassette]: CASSETTE_MODE가 off이면 None
+    """
+    global _CASSETTE
+    mode = os.getenv("CASSETTE_MODE", "off").lower()
+    if mode not in CASSETTE_MODES:
+        raise ValueError(
+            f"알 수 없는 카세트 모드입니다: '{mode}' (사용 가능: {', '.join(CASSETTE_MODES)})"
+        )
+    if mode == "off":
+        return None
+
+    path = os.getenv("CASSETTE_PATH", DEFAULT_CASSETTE_PATH)
+    speed = os.getenv("CASSETTE_SPEED", "original").lower()
+    match = os.getenv("CASSETTE_MATCH", "strict").lower()
+    # Streamlit 재실행/세션 사이에도 같은 설정이면 재사용
+    with _CASSETTE_LOCK:
+        settings = (path, mode, speed, match)
+        if _CASSETTE is None or (_CASSETTE.path, _CASSETTE.mode, _CASSETTE.speed, _CASSETTE.match) != settings:
+            if _CASSETTE is not None:
+                _CASSETTE.flush()
+            _CASSETTE = Cassette(path, mode, speed, match)
+        return _CASSETTE
+
+
+def flush_cassette() -> None:
+    """
+    현재 녹화 중인 카세트가 있으면 파일에 저장합니다. 저장 실패는 경고로만 남깁니다.
+    """
+    cassette = _CASSETTE
+    if cassette is None:
+        return
+    try:
+        cassette.flush()
+    except (OSError, TypeError, ValueError) as e:
+        warn("카세트 저장 실패", kv={"path": cassette.path, "error": type(e).__name__})
+
+
+atexit.register(flush_cassette)
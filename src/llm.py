@@ -1,22 +1,39 @@
 """
 LLM 모듈: Ollama를 사용한 로컬 LLM 초기화
 """
+from typing import Union
 from langchain_ollama import ChatOllama
+from cassette import get_cassette, CassetteChatModel
 from logging_utils import llm as log_llm, success
 
 
-def get_llm() -> ChatOllama:
+DEFAULT_MODEL = "llama3.1"
+
+
+def get_llm(model_name: str = DEFAULT_MODEL) -> Union[ChatOllama, CassetteChatModel]:
     """
-    로컬 Llama 3.1 모델을 초기화하여 반환합니다.
+    로컬 Ollama 모델을 초기화하여 반환합니다.
     
+    CASSETTE_MODE가 설정되어 있으면 녹화/재생 래퍼를 반환합니다.
+    
+    Args:
+        model_name: 사용할 Ollama 모델 이름 (기본: llama3.1)
+        
     Returns:
-        ChatOllama: 초기화된 ChatOllama 인스턴스
+        ChatOllama | CassetteChatModel: 초기화된 LLM 인스턴스
     """
-    model_name = "llama3.1"
+    # 재생 모드에서는 Ollama 서버 없이 카세트에서 응답
+    cassette = get_cassette()
+    if cassette is not None and cassette.replaying:
+        log_llm("LLM 재생 모드", kv={"model": model_name, "cassette": cassette.path})
+        return CassetteChatModel(cassette, model_name)
+    
     log_llm("LLM 초기화", kv={"model": model_name})
     llm = ChatOllama(
         model=model_name,
         temperature=0,
     )
     success("LLM 준비 완료", kv={"model": model_name})
+    if cassette is not None:
+        return CassetteChatModel(cassette, model_name, llm)
     return llm
@@ -6,6 +6,8 @@ import os
 from dotenv import load_dotenv
 
 from agent import generate_report
+from router import get_model_ladder
+from cassette import get_cassette, CassetteMissError
 from utils import validate_api_key
 
 # 환경 변수 로드
@@ -25,7 +27,15 @@ st.divider()
 
 # 세션 상태 초기화
 if "report_data" not in st.session_state:
-    st.session_state["report_data"] = None  # {report:str, topic:str, sources:list[str]}
+    st.session_state["report_data"] = None  # {report:str, topic:str, sources:list[str], model:str}
+
+# 녹화/재생 모드 확인 (재생 모드에서는 API Key 불필요)
+try:
+    cassette = get_cassette()
+except ValueError as e:
+    st.error(f"❌ 카세트 설정 오류: {str(e)}")
+    cassette = None
+replaying = cassette is not None and cassette.replaying
 
 # 사이드바: API Key 관리
 with st.sidebar:
@@ -34,7 +44,10 @@ with st.sidebar:
     # 환경 변수에서 API Key 확인
     env_api_key = os.getenv("TAVILY_API_KEY")
     
-    if env_api_key and validate_api_key(env_api_key):
+    if replaying:
+        st.info(f"📼 재생 모드: {cassette.path} (속도: {cassette.speed}, 매칭: {cassette.match})")
+        api_key = env_api_key
+    elif env_api_key and validate_api_key(env_api_key):
         st.success("✅ Tavily API Key 로드됨 (.env)")
         api_key = env_api_key
     else:
@@ -53,6 +66,16 @@ with st.sidebar:
     
     st.divider()
     
+    st.markdown("### ⚡ 응답 속도")
+    latency_tier = st.selectbox(
+        "모델 라우팅 티어",
+        options=["balanced", "fast", "quality"],
+        help="fast: 작은 모델 우선 / balanced: 프롬프트 길이에 따라 선택 / quality: 큰 모델 사용. "
+             "초안이 품질 검사에 실패하면 더 큰 모델로 다시 생성합니다."
+    )
+    
+    st.divider()
+    
     st.markdown("### 📝 사용 방법")
     st.markdown("""
     1. 리서치할 주제를 입력하세요
@@ -63,8 +86,8 @@ with st.sidebar:
     st.divider()
     
     st.markdown("### 🔧 시스템 정보")
-    st.markdown("""
-    - **LLM**: Ollama (llama3.1)
+    st.markdown(f"""
+    - **LLM**: Ollama ({" → ".join(get_model_ladder())})
     - **검색**: Tavily API
     - **검색 결과**: 최대 3개
     """)
@@ -89,7 +112,7 @@ with col2:
 
 # 보고서 생성 로직
 if generate_button:
-    if not api_key or not validate_api_key(api_key):
+    if not replaying and (not api_key or not validate_api_key(api_key)):
         st.error("❌ Tavily API Key를 먼저 입력해주세요!")
     elif not topic:
         st.error("❌ 리서치 주제를 입력해주세요!")
@@ -101,12 +124,13 @@ if generate_button:
                 st.caption(f"주제: {topic}")
                 
                 # 보고서 생성
-                result = generate_report(topic)
+                result = generate_report(topic, latency_tier=latency_tier)
                 # 세션에 결과 저장 (재실행 시에도 유지)
                 st.session_state["report_data"] = {
                     "report": result.get("report", ""),
                     "topic": topic,
-                    "sources": result.get("sources", [])
+                    "sources": result.get("sources", []),
+                    "model": result.get("model", "")
                 }
                 
                 st.write("✍️ 리포트 작성 중...")
@@ -116,6 +140,7 @@ if generate_button:
             
             # 결과 출력
             st.success("🎉 리포트가 성공적으로 생성되었습니다!")
+            st.caption(f"🤖 생성 모델: {result.get('model') or 'N/A'}")
             
             # 보고서 본문 출력
             st.markdown("---")
@@ -128,6 +153,10 @@ if generate_button:
                 for idx, url in enumerate(result["sources"], 1):
                     st.markdown(f"{idx}. [{url}]({url})")
             
+        except CassetteMissError as e:
+            st.error(f"❌ {str(e)}")
+            st.info("💡 CASSETTE_MODE=record 로 같은 주제를 다시 녹화하거나, CASSETTE_MATCH=topic 으로 재생해보세요.")
+            
         except ValueError as e:
             st.error(f"❌ {str(e)}")
             st.info("💡 다른 키워드나 주제로 다시 시도해보세요.")
@@ -137,7 +166,7 @@ if generate_button:
             with st.expander("🔧 Ollama 실행 방법"):
                 st.markdown("""
                 1. 터미널에서 `ollama serve` 실행
-                2. 모델 다운로드: `ollama pull llama3.1`
+                2. 모델 다운로드: `ollama pull llama3.1`, `ollama pull llama3.2:3b`
                 3. 서버가 실행 중인지 확인: `ollama list`
                 """)
                 
@@ -166,6 +195,8 @@ if st.session_state["report_data"]:
     rd = st.session_state["report_data"]
     st.markdown("---")
     st.subheader("💾 리포트 저장 및 다운로드")
+    if rd.get("model"):
+        st.caption(f"🤖 생성 모델: {rd['model']}")
 
     # 파일명 입력
     default_name = ("".join(c for c in rd["topic"] if c.isalnum() or c in (" ", "_"))).strip().replace(" ", "_")[:50] or "report"
@@ -0,0 +1,180 @@
+"""
+Router 모듈: 요청마다 모델 래더(ladder)에서 사용할 Ollama 모델을 선택
+
+환경 변수
+- LLM_MODEL_LADDER: 작은 모델부터 큰 모델 순서의 콤마 구분 목록 (기본 "llama3.2:3b,llama3.1")
+- LLM_PROMPT_CHAR_THRESHOLDS: balanced 티어에서 래더 각 단계가 맡는 최대 프롬프트 길이의
+  콤마 구분 목록 (마지막 모델 제외, 기본 6000, 12000, ... 단계마다 6000씩 증가)
+- LLM_ROUTING_LOG: 라우팅 결정/지연 시간을 JSONL로 기록할 파일 경로 (미설정 시 기록 안 함,
+  카세트 재생 중에는 실제 지연 시간이 아니므로 기록 안 함)
+"""
+import os
+import re
+import json
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from cassette import get_cassette
+from logging_utils import info, warn
+
+
+DEFAULT_LADDER = ["llama3.2:3b", "llama3.1"]
+LATENCY_TIERS = ("fast", "balanced", "quality")
+REQUIRED_HEADINGS = ("서론", "본론", "결론")
+
+_HANGUL_RE = re.compile(r"[가-힣]")
+_LATIN_WORD_RE = re.compile(r"[A-Za-z]+")
+_CODE_RE = re.compile(r"```.*?```|`[^`\n]*`", re.DOTALL)
+_H2_RE = re.compile(r"^##\s+(.+?)\s*#*\s*$")
+_HEADING_PREFIX_RE = re.compile(r"^[\d.)\s\-:*]+")
+
+
+def get_model_ladder() -> List[str]:
+    """
+    작은 모델부터 큰 모델 순서로 정렬된 모델 래더를 반환합니다.
+
+    Returns:
+        List[str]: 모델 이름 리스트 (마지막 항목이 가장 큰 모델)
+    """
+    raw = os.getenv("LLM_MODEL_LADDER", "")
+    ladder = [name.strip() for name in raw.split(",") if name.strip()]
+    return ladder or list(DEFAULT_LADDER)
+
+
+def get_prompt_thresholds(ladder_size: int) -> List[int]:
+    """
+    balanced 티어에서 사용할 단계별 최대 프롬프트 길이를 반환합니다.
+
+    Args:
+        ladder_size: 모델 래더 길이
+
+    Returns:
+        List[int]: 마지막 모델을 제외한 각 단계의 최대 프롬프트 길이 (ladder_size - 1개)
+    """
+    raw = os.getenv("LLM_PROMPT_CHAR_THRESHOLDS", "")
+    try:
+        thresholds = [int(value.strip()) for value in raw.split(",") if value.strip()]
+    except ValueError:
+        warn("잘못된 LLM_PROMPT_CHAR_THRESHOLDS 값, 기본값 사용", kv={"value": raw})
+        thresholds = []
+    # 값이 모자란 단계는 이전 단계보다 6000씩 늘려 채움
+    while len(thresholds) < ladder_size - 1:
+        thresholds.append((thresholds[-1] if thresholds else 0) + 6000)
+    return thresholds[:ladder_size - 1]
+
+
+def select_model(prompt_chars: int, latency_tier: str = "balanced") -> int:
+    """
+    프롬프트 길이와 지연 시간 티어를 바탕으로 시작할 래더 위치를 고릅니다.
+
+    Args:
+        prompt_chars: 프롬프트(주제 + 검색 결과) 문자 수
+        latency_tier: "fast" / "balanced" / "quality"
+
+    Returns:
+        int: 모델 래더 인덱스
+
+    Raises:
+        ValueError: 알 수 없는 티어일 때
+    """
+    if latency_tier not in LATENCY_TIERS:
+        raise ValueError(
+            f"알 수 없는 지연 시간 티어입니다: '{latency_tier}' "
+            f"(사용 가능: {', '.join(LATENCY_TIERS)})"
+        )
+    ladder_size = len(get_model_ladder())
+    if latency_tier == "fast":
+        return 0
+    if latency_tier == "quality":
+        return ladder_size - 1
+    # 프롬프트 길이가 처음으로 임계값 이하가 되는 단계에서 시작
+    for idx, limit in enumerate(get_prompt_thresholds(ladder_size)):
+        if prompt_chars <= limit:
+            return idx
+    return ladder_size - 1
+
+
+def check_draft(report: str) -> Tuple[bool, List[str]]:
+    """
+    초안이 최소 품질 기준을 만족하는지 가볍게 검사합니다.
+
+    서론/본론/결론이 각각 별도의 `##` 제목으로 있고, 본문이 주로 한국어인지 확인합니다.
+    기술 용어처럼 영어가 섞인 글도 통과하도록 영어는 글자가 아닌 단어 단위로 세고,
+    코드 블록/인라인 코드는 제외합니다.
+
+    Args:
+        report: LLM이 생성한 리포트 초안
+
+    Returns:
+        Tuple[bool, List[str]]: (통과 여부, 실패 사유 리스트)
+    """
+    problems = []
+    text = _CODE_RE.sub(" ", report or "")
+
+    headings = []
+    for line in text.splitlines():
+        match = _H2_RE.match(line.strip())
+        if match:
+            # "1. 서론", "서론: 개요" 같은 형태도 허용
+            headings.append(_HEADING_PREFIX_RE.sub("", match.group(1)))
+    for required in REQUIRED_HEADINGS:
+        if not any(heading.startswith(required) for heading in headings):
+            problems.append(f"missing:{required}")
+
+    hangul = len(_HANGUL_RE.findall(text))
+    latin_words = len(_LATIN_WORD_RE.findall(text))
+    if hangul == 0 or hangul / (hangul + latin_words) < 0.5:
+        problems.append("not_korean")
+
+    return (not problems, problems)
+
+
+def record_routing(
+    model: str,
+    latency_tier: str,
+    prompt_chars: int,
+    latency_s: float,
+    passed: bool,
+    problems: List[str],
+    escalated: bool,
+    error: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    라우팅 결정과 모델별 지연 시간을 로그로 남기고, LLM_ROUTING_LOG가 설정되어 있으면 파일에 추가합니다.
+
+    모델 로드/실행 오류로 승격한 경우 error에 예외 타입을 넘깁니다. 이 항목은 생성 시간이
+    아니므로 latency_s가 None으로 기록되어 지연 시간 통계에서 걸러낼 수 있습니다.
+
+    Returns:
+        dict: 기록된 항목
+    """
+    entry = {
+        "ts": time.time(),
+        "model": model,
+        "tier": latency_tier,
+        "prompt_chars": prompt_chars,
+        "latency_s": None if error else round(latency_s, 3),
+        "passed": passed,
+        "problems": problems,
+        "escalated": escalated,
+        "error": error,
+    }
+    kv = {"model": model, "tier": latency_tier, "chars": str(prompt_chars)}
+    if error:
+        warn("모델 실행 오류", kv={**kv, "error": error, "escalated": str(escalated)})
+    elif passed:
+        info("라우팅 기록", kv={**kv, "latency": f"{latency_s:.2f}s"})
+    else:
+        warn("초안 품질 검사 실패", kv={**kv, "latency": f"{latency_s:.2f}s", "problems": ",".join(problems)})
+
+    # 재생된 지연 시간은 튜닝 데이터에 섞이지 않도록 파일에 남기지 않음
+    cassette = get_cassette()
+    log_path: Optional[str] = os.getenv("LLM_ROUTING_LOG")
+    if log_path and not (cassette is not None and cassette.replaying):
+        try:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            warn("라우팅 로그 저장 실패", kv={"path": log_path, "error": type(e).__name__})
+
+    return entry